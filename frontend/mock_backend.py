@@ -1,8 +1,12 @@
 import json
 import os
+import uuid
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from textwrap import shorten
 
+# session_id -> incident title, so follow-ups can be answered without the original payload.
+SESSIONS = {}
+
 
 def synthesize_response(payload: dict) -> dict:
     """Builds a deterministic, payload-aware response without calling AWS."""
@@ -40,12 +44,35 @@ def synthesize_response(payload: dict) -> dict:
         "Rollback suspect deploy if errors align with release window",
     ]
 
+    session_id = uuid.uuid4().hex
+    SESSIONS[session_id] = title
+
     return {
         "summary": payload.get("summary_override", summary),
         "hypotheses": payload.get("hypotheses_override", hypotheses),
         "checks": payload.get("checks_override", checks),
         "fixes": payload.get("fixes_override", fixes),
         "raw_text": payload.get("raw_text_override", f"Synthesized for {title} / {svc}"),
+        "session_id": session_id,
+    }
+
+
+def synthesize_followup(session_id: str, question: str) -> dict:
+    """Deterministic follow-up answer for a session created by synthesize_response."""
+    title = SESSIONS[session_id]
+    hypotheses = [f"{shorten(question, width=80, placeholder='…')} could explain {title}"]
+    checks = ["Re-check the most recent changes related to the question"]
+    if "iam" in question.lower():
+        hypotheses.append("Execution role is missing bedrock:InvokeModel")
+        checks.append("Inspect the Lambda role policy and CloudTrail AccessDenied events")
+
+    return {
+        "summary": f"Follow-up on {title}: {shorten(question, width=120, placeholder='…')}",
+        "hypotheses": hypotheses,
+        "checks": checks,
+        "fixes": [],
+        "raw_text": f"Synthesized follow-up for {title}",
+        "session_id": session_id,
     }
 
 
@@ -70,7 +97,30 @@ class Handler(BaseHTTPRequestHandler):
             self.wfile.write(b'{"error": "Invalid JSON"}')
             return
 
-        response = synthesize_response(payload)
+        # Same status codes as lambda_handler for malformed or unknown follow-ups.
+        session_id = payload.get("session_id") if isinstance(payload, dict) else None
+        question = payload.get("question") if isinstance(payload, dict) else None
+        if (
+            not isinstance(payload, dict)
+            or not isinstance(session_id, (str, type(None)))
+            or not isinstance(question, (str, type(None)))
+        ):
+            self._set_headers(400)
+            self.wfile.write(b'{"error": "Invalid request body"}')
+            return
+        question = (question or "").strip()
+        if session_id or question:
+            if not (session_id and question):
+                self._set_headers(400)
+                self.wfile.write(b'{"error": "Follow-ups need both session_id and question"}')
+                return
+            if session_id not in SESSIONS:
+                self._set_headers(404)
+                self.wfile.write(b'{"error": "Unknown or expired session"}')
+                return
+            response = synthesize_followup(session_id, question)
+        else:
+            response = synthesize_response(payload)
 
         self._set_headers(200)
         self.wfile.write(json.dumps(response).encode())
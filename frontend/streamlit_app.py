@@ -66,28 +66,8 @@ logs = st.text_area(
     height=150,
 )
 
-if st.button("🔍 Analyze with GenAI", type="primary"):
-    if not symptoms.strip() and not logs.strip():
-        st.warning("Please provide some text (symptoms and/or logs) to analyze.")
-        st.stop()
-
-    payload: Dict[str, Any] = {
-        "incident_title": incident_title,
-        "service_context": service_context,
-        "symptoms": symptoms,
-        "logs": logs,
-    }
-
-    with st.spinner("Calling serverless backend (Lambda + Bedrock)…"):
-        try:
-            resp = requests.post(API_URL, json=payload, timeout=60)
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception as e:
-            st.error(f"Error calling backend: {e}")
-            st.stop()
 
-    st.subheader("🧠 AI Analysis")
+def render_analysis(data: Dict[str, Any]) -> None:
     summary = data.get("summary")
     hypotheses = data.get("hypotheses", [])
     checks = data.get("checks", [])
@@ -111,6 +91,74 @@ if st.button("🔍 Analyze with GenAI", type="primary"):
         for f in fixes:
             st.markdown(f"- {f}")
 
+
+if st.button("🔍 Analyze with GenAI", type="primary"):
+    if not symptoms.strip() and not logs.strip():
+        st.warning("Please provide some text (symptoms and/or logs) to analyze.")
+        st.stop()
+
+    payload: Dict[str, Any] = {
+        "incident_title": incident_title,
+        "service_context": service_context,
+        "symptoms": symptoms,
+        "logs": logs,
+    }
+
+    with st.spinner("Calling serverless backend (Lambda + Bedrock)…"):
+        try:
+            resp = requests.post(API_URL, json=payload, timeout=60)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            st.error(f"Error calling backend: {e}")
+            st.stop()
+
+    # Kept in session state so the analysis survives reruns triggered by follow-ups.
+    st.session_state["analysis"] = data
+    st.session_state["followups"] = []
+
+
+if "analysis" in st.session_state:
+    data = st.session_state["analysis"]
+    st.subheader("🧠 AI Analysis")
+    render_analysis(data)
+
     with st.expander("Raw backend response (for debugging / devs)", expanded=False):
         st.json(data)
 
+    for turn in st.session_state.get("followups", []):
+        st.markdown(f"#### 💬 {turn['question']}")
+        render_analysis(turn["answer"])
+
+    session_id = data.get("session_id")
+    if session_id:
+        with st.form("followup", clear_on_submit=True):
+            question = st.text_input("Ask a follow-up (only your question is sent; logs stay server-side)")
+            asked = st.form_submit_button("💬 Ask follow-up")
+
+        if asked and question.strip():
+            with st.spinner("Asking follow-up…"):
+                try:
+                    resp = requests.post(
+                        API_URL, json={"session_id": session_id, "question": question}, timeout=60
+                    )
+                    expired = resp.status_code == 404
+                    if not expired:
+                        resp.raise_for_status()
+                        answer = resp.json()
+                except Exception as e:
+                    st.error(f"Error calling backend: {e}")
+                    st.stop()
+
+            if expired:
+                # Sessions live in one backend container and expire; a different
+                # or recycled container will not know this session.
+                st.warning(
+                    "This follow-up session has expired or is no longer available. "
+                    "Please re-run **Analyze with GenAI** to start a new session."
+                )
+                st.stop()
+
+            st.session_state["followups"].append({"question": question, "answer": answer})
+            st.rerun()
+
@@ -19,10 +19,14 @@ module "lambda_backend" {
   memory_size = 512
   timeout     = 30
 
-  source_file = "${path.root}/../lambda/lambda_function.py"
+  source_dir = "${path.root}/../lambda"
 
-  bedrock_region   = var.bedrock_region
-  bedrock_model_id = var.bedrock_model_id
+  bedrock_region           = var.bedrock_region
+  bedrock_failover_regions = var.bedrock_failover_regions
+  bedrock_model_id         = var.bedrock_model_id
+
+  shadow_sample_rate = var.shadow_sample_rate
+  shadow_model_ids   = var.shadow_model_ids
 
   enable_function_url = true
 
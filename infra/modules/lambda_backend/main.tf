@@ -4,7 +4,8 @@ locals {
 
 data "archive_file" "lambda_package" {
   type        = "zip"
-  source_file = var.source_file
+  source_dir  = var.source_dir
+  excludes    = ["__pycache__"]
   output_path = local.lambda_zip_path
 }
 
@@ -45,6 +46,14 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "bedrock:InvokeModel"
         ]
         Resource = "*"
+      },
+      {
+        # Shadow evaluation replays sampled prompts via async self-invocation.
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = aws_lambda_function.this.arn
       }
     ]
   })
@@ -71,13 +80,24 @@ resource "aws_lambda_function" "this" {
   environment {
     variables = {
       BEDROCK_REGION   = var.bedrock_region
+      BEDROCK_REGIONS  = join(",", concat([var.bedrock_region], var.bedrock_failover_regions))
       BEDROCK_MODEL_ID = var.bedrock_model_id
+
+      SHADOW_SAMPLE_RATE = tostring(var.shadow_sample_rate)
+      SHADOW_MODEL_IDS   = join(",", var.shadow_model_ids)
     }
   }
 
   tags = var.tags
 }
 
+# Shadow-evaluation self-invocations are async; a retried job would re-emit the
+# records already logged for it and skew the report, so never retry.
+resource "aws_lambda_function_event_invoke_config" "this" {
+  function_name          = aws_lambda_function.this.function_name
+  maximum_retry_attempts = 0
+}
+
 resource "aws_lambda_function_url" "this" {
   count = var.enable_function_url ? 1 : 0
 
@@ -27,8 +27,8 @@ variable "timeout" {
   default     = 30
 }
 
-variable "source_file" {
-  description = "Path to lambda_function.py"
+variable "source_dir" {
+  description = "Path to the lambda/ directory (lambda_function.py and its helper modules)"
   type        = string
 }
 
@@ -37,11 +37,29 @@ variable "bedrock_region" {
   type        = string
 }
 
+variable "bedrock_failover_regions" {
+  description = "Extra Bedrock regions to load-balance and fail over to"
+  type        = list(string)
+  default     = []
+}
+
 variable "bedrock_model_id" {
   description = "Bedrock model ID"
   type        = string
 }
 
+variable "shadow_sample_rate" {
+  description = "Fraction (0-1) of live requests replayed against shadow candidate models"
+  type        = number
+  default     = 0
+}
+
+variable "shadow_model_ids" {
+  description = "Candidate Bedrock model IDs for shadow evaluation (empty = primary + fallback)"
+  type        = list(string)
+  default     = []
+}
+
 variable "enable_function_url" {
   description = "Whether to create a public Lambda Function URL (for demo)"
   type        = bool
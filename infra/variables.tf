@@ -16,6 +16,24 @@ variable "bedrock_region" {
   default     = "us-west-1"
 }
 
+variable "bedrock_failover_regions" {
+  description = "Additional regions the Lambda can spread Bedrock calls across"
+  type        = list(string)
+  default     = []
+}
+
+variable "shadow_sample_rate" {
+  description = "Fraction (0-1) of live requests replayed against shadow candidate models"
+  type        = number
+  default     = 0
+}
+
+variable "shadow_model_ids" {
+  description = "Candidate Bedrock model IDs for shadow evaluation (empty = primary + fallback)"
+  type        = list(string)
+  default     = []
+}
+
 variable "bedrock_model_id" {
   description = "Amazon Bedrock model ID to use"
   type        = string
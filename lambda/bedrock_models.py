@@ -0,0 +1,38 @@
+import json
+from typing import Any, Dict
+
+
+def is_nova(model_id: str) -> bool:
+    # Also matches cross-region inference profiles such as "us.amazon.nova-pro-v1:0".
+    return "amazon.nova" in model_id
+
+
+def build_request_body(model_id: str, prompt: str, max_tokens: int = 512, temperature: float = 0.3) -> str:
+    """Serialises an invoke_model body in the schema the model family expects.
+
+    Anthropic models get the Messages body; Nova models get the ``messages-v1``
+    schema with an ``inferenceConfig`` block.
+    """
+    if is_nova(model_id):
+        return json.dumps(
+            {
+                "schemaVersion": "messages-v1",
+                "messages": [{"role": "user", "content": [{"text": prompt}]}],
+                "inferenceConfig": {"maxTokens": max_tokens, "temperature": temperature},
+            }
+        )
+    return json.dumps(
+        {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+        }
+    )
+
+
+def extract_text(model_id: str, response_body: Dict[str, Any]) -> str:
+    """Reads the reply text from an Anthropic or Nova invoke_model response body."""
+    if is_nova(model_id):
+        return response_body["output"]["message"]["content"][0]["text"]
+    return response_body["content"][0]["text"]
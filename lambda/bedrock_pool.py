@@ -0,0 +1,188 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger()
+
+# Error codes that say "this region can't serve the call right now" rather than
+# "the request itself is bad". Only these trigger failover to another region.
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+THROTTLE_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException"}
+
+# botocore's default retries back off for seconds on throttling (and retry read
+# timeouts) before raising; make a single attempt instead so the pool does the
+# failing over. Budget: two regions x (connect + read) = 28s, under the 30s
+# Lambda timeout in infra/main.tf.
+CLIENT_CONFIG = Config(
+    retries={"mode": "standard", "total_max_attempts": 1},
+    connect_timeout=2,
+    read_timeout=12,
+)
+
+
+def _default_client_factory(region: str):
+    return boto3.client("bedrock-runtime", region_name=region, config=CLIENT_CONFIG)
+
+
+class RegionStats:
+    """Rolling latency / throttle / error view of one (region, model) pair."""
+
+    def __init__(self, prior_latency: float, alpha: float):
+        self.alpha = alpha
+        self.latency = prior_latency
+        self.throttle_rate = 0.0
+        self.error_rate = 0.0
+        self.cooldown_until = 0.0
+        self.calls = 0
+
+    def record(self, latency: Optional[float], throttled: bool = False, errored: bool = False) -> None:
+        a = self.alpha
+        self.calls += 1
+        if latency is not None:
+            self.latency = (1 - a) * self.latency + a * latency
+        self.throttle_rate = (1 - a) * self.throttle_rate + a * (1.0 if throttled else 0.0)
+        self.error_rate = (1 - a) * self.error_rate + a * (1.0 if errored else 0.0)
+
+    def weight(self, throttle_penalty: float) -> float:
+        """Higher is better: fast regions with few throttles/errors get more traffic."""
+        penalty = 1.0 + throttle_penalty * (self.throttle_rate + self.error_rate)
+        return 1.0 / (max(self.latency, 1e-3) * penalty)
+
+
+class BedrockClientPool:
+    """Spreads Bedrock calls across several regions and fails over on throttling/errors.
+
+    One client per region is created lazily and cached on the pool, so a
+    module-level pool reuses connections across warm Lambda invocations.
+    Regions are picked by weighted random choice using observed latency and
+    throttle/error rate, with the first (primary) region's weight multiplied
+    by ``primary_weight`` so that far-away failover regions only take a small
+    share while it is healthy. A region that throttles or errors is put on a
+    short cooldown and the call is retried in the next region.
+    """
+
+    def __init__(
+        self,
+        regions: Sequence[str],
+        client_factory: Callable[[str], Any] = _default_client_factory,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+        prior_latency: float = 1.0,
+        alpha: float = 0.2,
+        throttle_penalty: float = 10.0,
+        cooldown_seconds: float = 15.0,
+        primary_weight: float = 4.0,
+    ):
+        regions = [r.strip() for r in regions if r and r.strip()]
+        if not regions:
+            raise ValueError("BedrockClientPool needs at least one region")
+        self.regions: List[str] = list(dict.fromkeys(regions))
+        self._client_factory = client_factory
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._prior_latency = prior_latency
+        self._alpha = alpha
+        self._throttle_penalty = throttle_penalty
+        self._cooldown_seconds = cooldown_seconds
+        self._primary_weight = primary_weight
+        self._clients: Dict[str, Any] = {}
+        self._stats: Dict[Tuple[str, str], RegionStats] = {}
+        self._lock = threading.Lock()
+
+    def client(self, region: str):
+        """Returns the cached bedrock-runtime client for a region, creating it on first use."""
+        with self._lock:
+            if region not in self._clients:
+                self._clients[region] = self._client_factory(region)
+            return self._clients[region]
+
+    def stats(self, region: str, model_id: str) -> RegionStats:
+        with self._lock:
+            return self._stats_locked(region, model_id)
+
+    def _stats_locked(self, region: str, model_id: str) -> RegionStats:
+        key = (region, model_id)
+        if key not in self._stats:
+            self._stats[key] = RegionStats(self._prior_latency, self._alpha)
+        return self._stats[key]
+
+    def region_order(self, model_id: str) -> List[str]:
+        """Healthy regions first (weighted random by score), cooling-down regions last."""
+        now = self._clock()
+        with self._lock:
+            stats = {r: self._stats_locked(r, model_id) for r in self.regions}
+
+            healthy = [r for r in self.regions if stats[r].cooldown_until <= now]
+            cooling = sorted(
+                (r for r in self.regions if stats[r].cooldown_until > now),
+                key=lambda r: stats[r].cooldown_until,
+            )
+
+            order: List[str] = []
+            weights = {r: stats[r].weight(self._throttle_penalty) for r in healthy}
+            if self.regions[0] in weights:
+                weights[self.regions[0]] *= self._primary_weight
+            while healthy:
+                pick = self._rng.uniform(0, sum(weights[r] for r in healthy))
+                for region in healthy:
+                    pick -= weights[region]
+                    if pick <= 0:
+                        break
+                healthy.remove(region)
+                order.append(region)
+            return order + cooling
+
+    def _record(self, region: str, model_id: str, latency: Optional[float], throttled=False, errored=False):
+        with self._lock:
+            stats = self._stats_locked(region, model_id)
+            stats.record(latency, throttled=throttled, errored=errored)
+            if throttled or errored:
+                stats.cooldown_until = self._clock() + self._cooldown_seconds
+
+    def invoke_model(self, **kwargs) -> Dict[str, Any]:
+        """Same call shape as ``bedrock-runtime.invoke_model``, with regional failover.
+
+        Non-retryable errors (validation, access denied, ...) are raised straight
+        away; if every region fails with a retryable error, the last one is raised.
+        """
+        model_id = kwargs.get("modelId", "")
+        last_error: Optional[Exception] = None
+
+        for region in self.region_order(model_id):
+            client = self.client(region)
+            start = self._clock()
+            try:
+                response = client.invoke_model(**kwargs)
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code", "")
+                if code not in RETRYABLE_ERROR_CODES:
+                    raise
+                throttled = code in THROTTLE_ERROR_CODES
+                self._record(region, model_id, None, throttled=throttled, errored=not throttled)
+                logger.warning("Bedrock %s in %s (%s); failing over", model_id, region, code)
+                last_error = e
+                continue
+            except BotoCoreError as e:
+                self._record(region, model_id, None, errored=True)
+                logger.warning("Bedrock %s in %s unreachable (%s); failing over", model_id, region, e)
+                last_error = e
+                continue
+
+            self._record(region, model_id, self._clock() - start)
+            return response
+
+        assert last_error is not None
+        raise last_error
@@ -1,19 +1,85 @@
 import json
 import os
 import logging
-from typing import Any, Dict
+import uuid
+from typing import Any, Dict, List
 
-import boto3
 from botocore.exceptions import ClientError
 
+from bedrock_models import build_request_body, extract_text
+from bedrock_pool import BedrockClientPool
+from session_store import create_session_store
+from shadow_eval import (
+    DEFAULT_PRICES_PER_1K,
+    ShadowEvaluator,
+    jsonl_sink,
+    lambda_self_dispatcher,
+    log_sink,
+    thread_dispatcher,
+    validate_job,
+)
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 BEDROCK_REGION = os.getenv("BEDROCK_REGION", "us-east-1")
+# Comma-separated list of regions to spread calls across; the first is preferred
+# (see BedrockClientPool primary_weight), the rest take a share and absorb failover.
+BEDROCK_REGIONS = [
+    r.strip() for r in os.getenv("BEDROCK_REGIONS", BEDROCK_REGION).split(",") if r.strip()
+] or [BEDROCK_REGION]
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "amazon.nova-pro-v1:0")
 BEDROCK_MODEL_FALLBACK_ID = os.getenv("BEDROCK_MODEL_FALLBACK_ID", "anthropic.claude-3-haiku-20240307-v1:0")
 
-bedrock = boto3.client("bedrock-runtime", region_name=BEDROCK_REGION)
+# Module-level so region clients and latency/throttle stats survive warm invocations.
+bedrock_pool = BedrockClientPool(BEDROCK_REGIONS)
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "/tmp/sessions.db")
+# Follow-up prompts carry at most this many verbatim turns; older ones are folded
+# into a capped running summary so prompt size stays flat as a session grows.
+SESSION_RECENT_TURNS = 3
+SESSION_MAX_HISTORY_CHARS = 1200
+SESSION_MAX_QUESTION_CHARS = 1000
+
+session_store = create_session_store(SESSION_STORE, SESSION_TTL_SECONDS, SESSION_SQLITE_PATH)
+
+
+def _shadow_sample_rate() -> float:
+    # Optional evaluation setting: a typo must disable shadowing, not break cold starts.
+    raw = os.getenv("SHADOW_SAMPLE_RATE", "0")
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Invalid SHADOW_SAMPLE_RATE {raw!r}; shadow evaluation disabled")
+        return 0.0
+
+
+def _shadow_model_prices() -> Dict[str, Any]:
+    raw = os.getenv("SHADOW_MODEL_PRICES") or "{}"
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict):
+            raise ValueError("expected a JSON object")
+        prices = {}
+        for model_id, (in_price, out_price) in overrides.items():
+            prices[model_id] = (float(in_price), float(out_price))
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Invalid SHADOW_MODEL_PRICES ({e}); using default prices")
+        prices = {}
+    return {**DEFAULT_PRICES_PER_1K, **prices}
+
+
+# Shadow evaluation: replay a sample of live prompts against candidate models.
+SHADOW_SAMPLE_RATE = _shadow_sample_rate()
+SHADOW_MODEL_IDS = [
+    m.strip()
+    for m in (os.getenv("SHADOW_MODEL_IDS") or f"{BEDROCK_MODEL_ID},{BEDROCK_MODEL_FALLBACK_ID}").split(",")
+    if m.strip()
+]
+SHADOW_RECORDS_PATH = os.getenv("SHADOW_RECORDS_PATH", "")
+SHADOW_MODEL_PRICES = _shadow_model_prices()
 
 
 def build_prompt(payload: Dict[str, Any]) -> str:
@@ -49,33 +115,99 @@ Avoid inventing internal company details or sensitive information.
     return prompt
 
 
+def _truncate(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _key_log_lines(logs: str, limit: int = 5) -> List[str]:
+    """Keeps only the log lines most likely to matter for follow-ups (errors, warnings, timeouts)."""
+    markers = ("error", "exception", "warn", "timeout", "timed out", "denied", "throttl", "fail")
+    lines = [l.strip() for l in logs.splitlines() if l.strip()]
+    picked = [l for l in lines if any(m in l.lower() for m in markers)] or lines
+    return [_truncate(l, 200) for l in picked[:limit]]
+
+
+def compact_context(payload: Dict[str, Any], parsed: Dict[str, Any]) -> str:
+    """Condenses the original request and first analysis into a short, fixed-size context."""
+    parts = [
+        f"Incident title: {_truncate(str(payload.get('incident_title') or 'Unknown incident'), 150)}",
+        f"Service context: {_truncate(str(payload.get('service_context') or 'Unknown service'), 150)}",
+        f"Symptoms: {_truncate(str(payload.get('symptoms') or 'N/A'), 400)}",
+    ]
+    log_lines = _key_log_lines(payload.get("logs", "") or "")
+    if log_lines:
+        parts.append("Key log lines:\n" + "\n".join(f"- {l}" for l in log_lines))
+    parts.append(f"Initial analysis: {_truncate(parsed.get('summary') or '', 400)}")
+    hypotheses = parsed.get("hypotheses", [])[:3]
+    if hypotheses:
+        parts.append("Initial root-cause hypotheses:\n" + "\n".join(f"- {_truncate(h, 150)}" for h in hypotheses))
+    return "\n".join(parts)
+
+
+def new_session(payload: Dict[str, Any], parsed: Dict[str, Any]) -> Dict[str, Any]:
+    return {"context": compact_context(payload, parsed), "history": "", "turns": []}
+
+
+def add_session_turn(session: Dict[str, Any], question: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Appends a follow-up turn, folding the oldest turns into the capped history summary."""
+    answer = _truncate(parsed.get("summary") or "", 300)
+    session["turns"].append({"question": _truncate(question, 300), "answer": answer})
+    while len(session["turns"]) > SESSION_RECENT_TURNS:
+        old = session["turns"].pop(0)
+        folded = f"{session['history']} Q: {old['question']} A: {old['answer']}".strip()
+        # Keep the newest part of the history when it overflows.
+        if len(folded) > SESSION_MAX_HISTORY_CHARS:
+            folded = "…" + folded[-(SESSION_MAX_HISTORY_CHARS - 1):]
+        session["history"] = folded
+    return session
+
+
+def build_followup_prompt(session: Dict[str, Any], question: str) -> str:
+    """Builds a follow-up prompt from the compacted session instead of the original logs."""
+    earlier = session.get("history") or "N/A"
+    recent = "\n".join(
+        f"Q: {t['question']}\nA: {t['answer']}" for t in session.get("turns", [])
+    ) or "N/A"
+
+    prompt = f"""You are a senior cloud and DevOps engineer.
+You are continuing an incident investigation in AWS-based systems.
+
+Context from the earlier analysis (condensed):
+{session.get("context", "N/A")}
+
+Earlier follow-ups (condensed):
+{earlier}
+
+Most recent follow-ups:
+{recent}
+
+New follow-up question:
+{question}
+
+Answer the question in three sections with clear bullet points:
+
+1. Summary (1–2 sentences)
+2. Possible root causes (2–4 bullets)
+3. Checks and suggested actions (3–6 bullets)
+
+Focus on actionable, realistic steps. Avoid inventing internal company details or sensitive information.
+"""
+    return prompt
+
+
 def call_bedrock_model(prompt: str) -> str:
-    """Calls the configured Bedrock model (e.g., Claude 3 Haiku) with a simple chat-style request."""
-    body = json.dumps(
-        {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 512,
-            "temperature": 0.3,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt}
-                    ],
-                }
-            ],
-        }
-    )
+    """Calls the configured Bedrock model (Anthropic or Nova) with a simple chat-style request."""
 
     def _invoke(model_id: str) -> str:
-        response = bedrock.invoke_model(
+        response = bedrock_pool.invoke_model(
             modelId=model_id,
             contentType="application/json",
             accept="application/json",
-            body=body,
+            body=build_request_body(model_id, prompt),
         )
         response_body = json.loads(response.get("body").read())
-        return response_body["content"][0]["text"]
+        return extract_text(model_id, response_body)
 
     try:
         return _invoke(BEDROCK_MODEL_ID)
@@ -134,9 +266,42 @@ def parse_ai_response(text: str) -> Dict[str, Any]:
     return sections
 
 
+# Replays get their own pool so their throttles, cooldowns and latencies never
+# steer live traffic in this container.
+shadow_pool = BedrockClientPool(BEDROCK_REGIONS)
+shadow_evaluator = ShadowEvaluator(
+    shadow_pool,
+    SHADOW_MODEL_IDS,
+    SHADOW_SAMPLE_RATE,
+    parse_ai_response,
+    sink=jsonl_sink(SHADOW_RECORDS_PATH) if SHADOW_RECORDS_PATH else log_sink,
+    prices=SHADOW_MODEL_PRICES,
+)
+if shadow_evaluator.enabled:
+    if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+        shadow_evaluator.dispatch = lambda_self_dispatcher(os.environ["AWS_LAMBDA_FUNCTION_NAME"])
+    else:
+        shadow_evaluator.dispatch = thread_dispatcher(shadow_evaluator)
+
+
 def lambda_handler(event, context):
     logger.info(f"Incoming event: {json.dumps(event)[:500]}")
 
+    # Async self-invocations carrying a sampled prompt. Function URL / API Gateway
+    # events always have requestContext, so callers over HTTP cannot reach this.
+    if isinstance(event, dict) and "shadow_eval" in event and "requestContext" not in event:
+        problem = validate_job(event["shadow_eval"])
+        if problem:
+            # Returning (not raising) stops Lambda from retrying a bad async event.
+            logger.warning(f"Ignoring shadow job: {problem}")
+            return {"statusCode": 400, "body": json.dumps({"error": problem})}
+        budget = None
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            # Leave a couple of seconds to emit records before the invocation times out.
+            budget = min(shadow_evaluator.time_budget_seconds, context.get_remaining_time_in_millis() / 1000 - 2)
+        records = shadow_evaluator.run(event["shadow_eval"], time_budget_seconds=budget)
+        return {"statusCode": 200, "body": json.dumps({"shadow_records": len(records)})}
+
     try:
         if "body" in event:
             body = event["body"]
@@ -154,10 +319,54 @@ def lambda_handler(event, context):
             "body": json.dumps({"error": "Invalid JSON body"}),
         }
 
+    session_id = payload.get("session_id") if isinstance(payload, dict) else None
+    question = payload.get("question") if isinstance(payload, dict) else None
+    if (
+        not isinstance(payload, dict)
+        or not isinstance(session_id, (str, type(None)))
+        or not isinstance(question, (str, type(None)))
+    ):
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"error": "Body must be a JSON object; session_id and question must be strings"}),
+        }
+    question = (question or "").strip()[:SESSION_MAX_QUESTION_CHARS]
+    if (session_id or question) and not (session_id and question):
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"error": "Follow-ups need both session_id and question"}),
+        }
+
     try:
-        prompt = build_prompt(payload)
+        session = session_store.get(session_id) if session_id else None
+        if session_id and session is None:
+            return {
+                "statusCode": 404,
+                "headers": {"Content-Type": "application/json"},
+                "body": json.dumps({"error": "Unknown or expired session"}),
+            }
+
+        if session is not None:
+            prompt = build_followup_prompt(session, question)
+        else:
+            prompt = build_prompt(payload)
         ai_text = call_bedrock_model(prompt)
         parsed = parse_ai_response(ai_text)
+        shadow_evaluator.maybe_dispatch(prompt)
+
+        if session is not None:
+            session = add_session_turn(session, question, parsed)
+        else:
+            session_id = uuid.uuid4().hex
+            session = new_session(payload, parsed)
+        try:
+            session_store.put(session_id, session)
+        except Exception as e:
+            # Sessions are a convenience; never fail the analysis because of them.
+            logger.warning(f"Could not save session {session_id}: {e}")
+            session_id = None
 
         response_body = {
             "summary": parsed.get("summary"),
@@ -165,6 +374,7 @@ def lambda_handler(event, context):
             "checks": parsed.get("checks", []),
             "fixes": parsed.get("fixes", []),
             "raw_text": ai_text,
+            "session_id": session_id,
         }
 
         return {
@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class SessionStore:
+    """Backend interface for follow-up conversation sessions.
+
+    A session is a JSON-serialisable dict keyed by session ID. Every ``put``
+    refreshes the session's TTL; expired sessions behave as if they never
+    existed. Implement ``get``/``put``/``delete`` to plug in another backend
+    (e.g. DynamoDB with its native TTL attribute).
+    """
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store; sessions live as long as the warm Lambda container."""
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.time, max_sessions: int = 1000):
+        super().__init__(ttl_seconds, clock)
+        self.max_sessions = max_sessions
+        self._items: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is None:
+                return None
+            expires_at, data = item
+            if expires_at <= self._clock():
+                del self._items[session_id]
+                return None
+            return json.loads(data)
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        with self._lock:
+            now = self._clock()
+            self._items.pop(session_id, None)
+            self._items[session_id] = (now + self.ttl_seconds, json.dumps(session))
+            self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def _evict(self, now: float) -> None:
+        for sid in [sid for sid, (expires_at, _) in self._items.items() if expires_at <= now]:
+            del self._items[sid]
+        # Dicts keep insertion order and put() re-inserts, so the first key is the stalest.
+        while len(self._items) > self.max_sessions:
+            del self._items[next(iter(self._items))]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store, e.g. on /tmp in Lambda or a shared path for local runs."""
+
+    def __init__(self, path: str, ttl_seconds: float, clock: Callable[[], float] = time.time):
+        super().__init__(ttl_seconds, clock)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, self._clock()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, expires_at, data) VALUES (?, ?, ?)",
+                (session_id, now + self.ttl_seconds, json.dumps(session)),
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+def create_session_store(backend: str, ttl_seconds: float, sqlite_path: str = "/tmp/sessions.db") -> SessionStore:
+    """Builds the store named by SESSION_STORE ("memory" or "sqlite")."""
+    backend = (backend or "memory").strip().lower()
+    if backend == "memory":
+        return InMemorySessionStore(ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteSessionStore(sqlite_path, ttl_seconds)
+    raise ValueError(f"Unknown session store backend: {backend!r}")
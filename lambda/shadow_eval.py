@@ -0,0 +1,383 @@
+"""Shadow-traffic evaluation of candidate Bedrock models.
+
+A sampled fraction of live prompts is replayed against candidate models off
+the critical path; each replay produces one JSON record (latency, tokens,
+cost estimate, whether the parser found hypotheses/checks). Records are
+logged with a ``SHADOW_EVAL`` prefix and can be aggregated with:
+
+    python lambda/shadow_eval.py records.jsonl [more.jsonl ...]
+
+Input lines may be raw JSON records or CloudWatch log lines containing
+``SHADOW_EVAL {...}``.
+"""
+
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import boto3
+from botocore.config import Config
+
+from bedrock_models import build_request_body, extract_text
+
+logger = logging.getLogger()
+
+LOG_PREFIX = "SHADOW_EVAL"
+
+# The self-invoke sits on the live request path, so it must fail fast rather
+# than use boto3's 60s timeouts and legacy retries.
+DISPATCH_CLIENT_CONFIG = Config(
+    retries={"mode": "standard", "total_max_attempts": 1},
+    connect_timeout=1,
+    read_timeout=1,
+)
+
+# USD per 1K tokens (input, output), on-demand list prices. Override with
+# SHADOW_MODEL_PRICES='{"model-id": [in_per_1k, out_per_1k]}'.
+DEFAULT_PRICES_PER_1K = {
+    "amazon.nova-pro-v1:0": (0.0008, 0.0032),
+    "amazon.nova-lite-v1:0": (0.00006, 0.00024),
+    "amazon.nova-micro-v1:0": (0.000035, 0.00014),
+    "anthropic.claude-3-haiku-20240307-v1:0": (0.00025, 0.00125),
+    "anthropic.claude-3-5-haiku-20241022-v1:0": (0.0008, 0.004),
+    "anthropic.claude-3-sonnet-20240229-v1:0": (0.003, 0.015),
+}
+
+
+def validate_job(job: Any) -> Optional[str]:
+    """Returns why a shadow job is unusable, or None if it can be run."""
+    if not isinstance(job, dict):
+        return "job must be an object"
+    if not isinstance(job.get("prompt"), str) or not job["prompt"].strip():
+        return "job.prompt must be a non-empty string"
+    model_ids = job.get("model_ids")
+    if model_ids is not None and (
+        not isinstance(model_ids, list) or not all(isinstance(m, str) for m in model_ids)
+    ):
+        return "job.model_ids must be a list of strings"
+    return None
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough chars-per-token heuristic, only used when the model reports no usage.
+    return max(1, len(text) // 4)
+
+
+def extract_usage(response: Dict[str, Any], response_body: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Reads token counts from the response body usage block or the Bedrock headers."""
+    usage = response_body.get("usage") or {}
+    input_tokens = usage.get("input_tokens", usage.get("inputTokens"))
+    output_tokens = usage.get("output_tokens", usage.get("outputTokens"))
+
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    if input_tokens is None and "x-amzn-bedrock-input-token-count" in headers:
+        input_tokens = int(headers["x-amzn-bedrock-input-token-count"])
+    if output_tokens is None and "x-amzn-bedrock-output-token-count" in headers:
+        output_tokens = int(headers["x-amzn-bedrock-output-token-count"])
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+
+def estimate_cost(model_id: str, input_tokens: int, output_tokens: int, prices: Dict[str, Sequence[float]]) -> Optional[float]:
+    if model_id not in prices:
+        return None
+    in_price, out_price = prices[model_id]
+    return round(input_tokens / 1000 * in_price + output_tokens / 1000 * out_price, 8)
+
+
+class ShadowEvaluator:
+    """Samples live prompts and replays them against candidate models.
+
+    ``client`` is anything with a bedrock-runtime ``invoke_model`` (a boto3
+    client, the region pool, or an offline fake). ``dispatch`` receives the
+    job dict for a sampled prompt and must return immediately; it is expected
+    to arrange for ``run(job)`` to happen elsewhere (defaults to running it
+    inline, which is only meant for tests). ``sink`` receives every record
+    produced by ``run``.
+
+    Candidate models are replayed concurrently and the whole job is bounded
+    by ``time_budget_seconds``; models that have not answered by then are
+    recorded as timed out, so a job fits in one invocation and is never
+    half-emitted and retried.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model_ids: Sequence[str],
+        sample_rate: float,
+        parse: Callable[[str], Dict[str, Any]],
+        dispatch: Optional[Callable[[Dict[str, Any]], None]] = None,
+        sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        prices: Optional[Dict[str, Sequence[float]]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+        rng: Optional[random.Random] = None,
+        time_budget_seconds: float = 25.0,
+        max_workers: Optional[int] = None,
+    ):
+        self.client = client
+        self.model_ids = _dedupe(model_ids)
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self._parse = parse
+        self.dispatch = dispatch if dispatch is not None else self.run
+        self._sink = sink or log_sink
+        self._prices = prices if prices is not None else DEFAULT_PRICES_PER_1K
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self.time_budget_seconds = time_budget_seconds
+        self._max_workers = max_workers
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and bool(self.model_ids)
+
+    def maybe_dispatch(self, prompt: str) -> bool:
+        """Samples the prompt and hands it to the dispatcher; never raises."""
+        if not self.enabled or self._rng.random() >= self.sample_rate:
+            return False
+        job = {"job_id": uuid.uuid4().hex, "prompt": prompt, "model_ids": self.model_ids}
+        try:
+            self.dispatch(job)
+        except Exception as e:
+            logger.warning(f"Shadow dispatch failed: {e}")
+            return False
+        return True
+
+    def run(self, job: Dict[str, Any], time_budget_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Replays one job against each candidate model and emits a record per model.
+
+        Malformed jobs are logged and skipped rather than raised, so Lambda does
+        not retry the async event.
+        """
+        problem = validate_job(job)
+        if problem:
+            logger.warning(f"Skipping shadow job: {problem}")
+            return []
+        prompt = job["prompt"]
+        model_ids = _dedupe(job.get("model_ids") or self.model_ids)
+        budget = self.time_budget_seconds if time_budget_seconds is None else time_budget_seconds
+
+        executor = ThreadPoolExecutor(max_workers=min(len(model_ids), self._max_workers or len(model_ids)))
+        futures = {m: executor.submit(self._evaluate, m, prompt) for m in model_ids}
+        wait(futures.values(), timeout=max(budget, 0.0))
+        # Stragglers are abandoned: their results are never emitted.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        records = []
+        for model_id, future in futures.items():
+            if future.done() and not future.cancelled():
+                record = future.result()
+            else:
+                record = {
+                    "ts": time.time(),
+                    "model_id": model_id,
+                    "ok": False,
+                    "latency_ms": round(budget * 1000, 1),
+                    "error": f"Timed out: shadow time budget of {budget:.1f}s exceeded",
+                }
+            record["job_id"] = job.get("job_id")
+            try:
+                self._sink(record)
+            except Exception as e:
+                logger.warning(f"Shadow sink failed: {e}")
+            records.append(record)
+        return records
+
+    def _evaluate(self, model_id: str, prompt: str) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"ts": time.time(), "model_id": model_id, "ok": False}
+        start = self._clock()
+        try:
+            response = self.client.invoke_model(
+                modelId=model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=build_request_body(model_id, prompt),
+            )
+            response_body = json.loads(response.get("body").read())
+            text = extract_text(model_id, response_body)
+        except Exception as e:
+            record["latency_ms"] = round((self._clock() - start) * 1000, 1)
+            record["error"] = f"{type(e).__name__}: {e}"[:300]
+            return record
+        record["latency_ms"] = round((self._clock() - start) * 1000, 1)
+
+        usage = extract_usage(response, response_body)
+        estimated = usage["input_tokens"] is None or usage["output_tokens"] is None
+        input_tokens = usage["input_tokens"] if usage["input_tokens"] is not None else _estimate_tokens(prompt)
+        output_tokens = usage["output_tokens"] if usage["output_tokens"] is not None else _estimate_tokens(text)
+
+        parsed = self._parse(text)
+        record.update(
+            ok=True,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            tokens_estimated=estimated,
+            cost_usd=estimate_cost(model_id, input_tokens, output_tokens, self._prices),
+            has_hypotheses=bool(parsed.get("hypotheses")),
+            has_checks=bool(parsed.get("checks")),
+        )
+        return record
+
+
+def _dedupe(model_ids: Sequence[str]) -> List[str]:
+    return list(dict.fromkeys(m.strip() for m in model_ids if m and m.strip()))
+
+
+def log_sink(record: Dict[str, Any]) -> None:
+    logger.info(f"{LOG_PREFIX} {json.dumps(record)}")
+
+
+def jsonl_sink(path: str) -> Callable[[Dict[str, Any]], None]:
+    """Logs each record and also appends it to a local JSONL file."""
+    lock = threading.Lock()
+
+    def _sink(record: Dict[str, Any]) -> None:
+        log_sink(record)
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    return _sink
+
+
+def dispatch_lambda_client(region: Optional[str] = None):
+    return boto3.client("lambda", region_name=region, config=DISPATCH_CLIENT_CONFIG)
+
+
+def lambda_self_dispatcher(function_name: str, region: Optional[str] = None) -> Callable[[Dict[str, Any]], None]:
+    """Dispatches jobs as async (Event) invocations of this same function.
+
+    The Invoke call is made synchronously: it only queues the event and returns
+    202 within tens of milliseconds, whereas a background thread would be frozen
+    with the container once the response is returned and could lose samples.
+    The client uses 1s timeouts and no retries (``DISPATCH_CLIENT_CONFIG``), so
+    a slow Lambda API costs a dropped sample, not a delayed response. The
+    replay itself runs in its own invocation, off the live request path.
+    """
+    lambda_client = dispatch_lambda_client(region)
+
+    def _dispatch(job: Dict[str, Any]) -> None:
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"shadow_eval": job}).encode(),
+        )
+
+    return _dispatch
+
+
+def thread_dispatcher(evaluator: ShadowEvaluator) -> Callable[[Dict[str, Any]], None]:
+    """Runs jobs on a daemon thread in this process (local runs outside Lambda)."""
+
+    def _dispatch(job: Dict[str, Any]) -> None:
+        threading.Thread(target=evaluator.run, args=(job,), daemon=True).start()
+
+    return _dispatch
+
+
+# --- Report ---------------------------------------------------------------
+
+
+def load_records(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parses raw JSON lines or log lines carrying a ``SHADOW_EVAL {...}`` payload."""
+    records = []
+    for line in lines:
+        line = line.strip()
+        if LOG_PREFIX in line:
+            line = line[line.index(LOG_PREFIX) + len(LOG_PREFIX):].strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict) and "model_id" in record:
+            records.append(record)
+    return records
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregates shadow records into per-model latency, token, cost and quality stats."""
+    by_model: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_model.setdefault(record["model_id"], []).append(record)
+
+    summary = {}
+    for model_id, rows in sorted(by_model.items()):
+        ok = [r for r in rows if r.get("ok")]
+        latencies = [r["latency_ms"] for r in ok]
+        costs = [r["cost_usd"] for r in ok if r.get("cost_usd") is not None]
+        summary[model_id] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "avg_input_tokens": sum(r["input_tokens"] for r in ok) / len(ok) if ok else None,
+            "avg_output_tokens": sum(r["output_tokens"] for r in ok) / len(ok) if ok else None,
+            "cost_per_incident_usd": sum(costs) / len(costs) if costs else None,
+            "parsed_rate": sum(1 for r in ok if r.get("has_hypotheses") and r.get("has_checks")) / len(ok) if ok else None,
+        }
+    return summary
+
+
+def format_report(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Renders the per-model summary as Markdown tables."""
+
+    def fmt(value, spec):
+        return "n/a" if value is None else format(value, spec)
+
+    lines = [
+        "## Latency",
+        "",
+        "| Model | Requests | Errors | p50 (ms) | p99 (ms) |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for model_id, s in summary.items():
+        lines.append(
+            f"| {model_id} | {s['requests']} | {s['errors']} | {fmt(s['p50_ms'], '.0f')} | {fmt(s['p99_ms'], '.0f')} |"
+        )
+    lines += [
+        "",
+        "## Cost and quality",
+        "",
+        "| Model | Avg input tokens | Avg output tokens | Cost / incident (USD) | Parsed hypotheses+checks |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for model_id, s in summary.items():
+        lines.append(
+            f"| {model_id} | {fmt(s['avg_input_tokens'], '.0f')} | {fmt(s['avg_output_tokens'], '.0f')} "
+            f"| {fmt(s['cost_per_incident_usd'], '.6f')} | {fmt(s['parsed_rate'], '.0%')} |"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    paths = list(sys.argv[1:] if argv is None else argv)
+    records: List[Dict[str, Any]] = []
+    if not paths:
+        records = load_records(sys.stdin)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(load_records(f))
+    if not records:
+        print("No shadow records found.", file=sys.stderr)
+        return 1
+    print(format_report(summarize(records)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
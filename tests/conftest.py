@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the lambda modules importable when running pytest from repo root.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "lambda"))
+
+
+class FakeClock:
+    """Manually advanced clock; fakes move ``now`` forward to simulate latency."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
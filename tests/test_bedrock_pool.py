@@ -0,0 +1,145 @@
+import random
+import re
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from bedrock_pool import BedrockClientPool, _default_client_factory
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODEL_ID = "test-model"
+
+
+class FakeRegionClient:
+    """Offline stand-in for a regional bedrock-runtime client.
+
+    ``latency`` advances the shared fake clock; ``throttle_every`` makes every
+    Nth call raise ThrottlingException; ``error`` makes every call raise it.
+    """
+
+    def __init__(self, region, clock, latency=0.5, throttle_every=0, error=None):
+        self.region = region
+        self.clock = clock
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.error = error
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        if self.throttle_every and self.calls % self.throttle_every == 0:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+                "InvokeModel",
+            )
+        self.clock.now += self.latency
+        return {"region": self.region}
+
+
+def _make_pool(clock, profiles, **kwargs):
+    clients = {region: FakeRegionClient(region, clock, **p) for region, p in profiles.items()}
+    created = []
+
+    def factory(region):
+        created.append(region)
+        return clients[region]
+
+    pool = BedrockClientPool(
+        list(profiles),
+        client_factory=factory,
+        clock=clock,
+        rng=random.Random(7),
+        **kwargs,
+    )
+    return pool, clients, created
+
+
+def test_pool_reuses_one_client_per_region(clock):
+    pool, _, created = _make_pool(clock, {"us-east-1": {}, "us-west-2": {}})
+
+    for _ in range(20):
+        pool.invoke_model(modelId=MODEL_ID)
+
+    assert sorted(created) == ["us-east-1", "us-west-2"]
+
+
+def test_pool_prefers_faster_region(clock):
+    pool, clients, _ = _make_pool(clock, {"us-east-1": {"latency": 2.0}, "us-west-2": {"latency": 0.2}})
+
+    for _ in range(200):
+        pool.invoke_model(modelId=MODEL_ID)
+
+    # Much lower latency outweighs the primary region's preference.
+    assert clients["us-west-2"].calls > clients["us-east-1"].calls
+
+
+def test_pool_shifts_traffic_away_from_throttling_region(clock):
+    pool, clients, _ = _make_pool(
+        clock,
+        {"us-east-1": {"latency": 0.5, "throttle_every": 2}, "us-west-2": {"latency": 0.5}},
+        cooldown_seconds=1.0,
+    )
+
+    served = Counter()
+    for _ in range(200):
+        served[pool.invoke_model(modelId=MODEL_ID)["region"]] += 1
+        clock.now += 1.0
+
+    assert sum(served.values()) == 200
+    assert served["us-west-2"] > 3 * served["us-east-1"]
+    assert pool.stats("us-east-1", MODEL_ID).throttle_rate > pool.stats("us-west-2", MODEL_ID).throttle_rate
+
+
+def test_pool_fails_over_when_region_is_down(clock):
+    down = EndpointConnectionError(endpoint_url="https://bedrock-runtime.us-east-1.amazonaws.com")
+    pool, clients, _ = _make_pool(clock, {"us-east-1": {"error": down}, "eu-central-1": {}})
+
+    for _ in range(10):
+        assert pool.invoke_model(modelId=MODEL_ID)["region"] == "eu-central-1"
+
+    # After the first failure us-east-1 is cooling down and is not retried first.
+    assert clients["us-east-1"].calls == 1
+
+
+def test_pool_raises_non_retryable_errors_without_failover(clock):
+    denied = ClientError({"Error": {"Code": "AccessDeniedException", "Message": "no"}}, "InvokeModel")
+    pool, clients, _ = _make_pool(clock, {"us-east-1": {"error": denied}, "us-west-2": {"error": denied}})
+
+    with pytest.raises(ClientError):
+        pool.invoke_model(modelId=MODEL_ID)
+
+    assert clients["us-east-1"].calls + clients["us-west-2"].calls == 1
+
+
+def test_pool_raises_last_error_when_all_regions_throttle(clock):
+    pool, _, _ = _make_pool(clock, {"us-east-1": {"throttle_every": 1}, "us-west-2": {"throttle_every": 1}})
+
+    with pytest.raises(ClientError) as exc:
+        pool.invoke_model(modelId=MODEL_ID)
+
+    assert exc.value.response["Error"]["Code"] == "ThrottlingException"
+
+
+def test_default_clients_leave_failover_to_the_pool():
+    config = _default_client_factory("us-east-1").meta.config
+    lambda_timeout = int(re.search(r"timeout\s*=\s*(\d+)", (ROOT / "infra" / "main.tf").read_text()).group(1))
+
+    worst_case_per_region = config.retries["total_max_attempts"] * (config.connect_timeout + config.read_timeout)
+    # A hanging region must give up early enough for a second region to be tried.
+    assert 2 * worst_case_per_region < lambda_timeout
+
+
+def test_pool_prefers_primary_region_at_equal_latency(clock):
+    pool, clients, _ = _make_pool(
+        clock, {"us-east-1": {"latency": 0.5}, "ap-southeast-2": {"latency": 0.5}}
+    )
+
+    for _ in range(400):
+        pool.invoke_model(modelId=MODEL_ID)
+
+    assert clients["us-east-1"].calls > 2 * clients["ap-southeast-2"].calls
@@ -1,16 +1,14 @@
 import json
-import sys
+import sqlite3
 from io import BytesIO
-from pathlib import Path
 
+import boto3
 from botocore.response import StreamingBody
 from botocore.stub import ANY, Stubber
 
-# Make the lambda module importable when running pytest from repo root.
-ROOT = Path(__file__).resolve().parent.parent
-sys.path.append(str(ROOT / "lambda"))
-
-import lambda_function  # noqa: E402  pylint: disable=wrong-import-position
+import lambda_function
+from bedrock_models import is_nova
+from bedrock_pool import BedrockClientPool
 
 
 def _make_streaming_body(payload: dict) -> StreamingBody:
@@ -18,18 +16,18 @@ def _make_streaming_body(payload: dict) -> StreamingBody:
     return StreamingBody(BytesIO(data), len(data))
 
 
-def test_lambda_handler_parses_bedrock_response():
-    response_payload = {
-        "content": [
-            {
-                "text": "Summary line\n\n"
-                "Possible root causes:\n- rc1\n"
-                "Checks and suggested actions:\n- check1"
-            }
-        ]
-    }
-
-    with Stubber(lambda_function.bedrock) as stub:
+def test_lambda_handler_parses_bedrock_response(monkeypatch):
+    text = "Summary line\n\nPossible root causes:\n- rc1\nChecks and suggested actions:\n- check1"
+    if is_nova(lambda_function.BEDROCK_MODEL_ID):
+        response_payload = {"output": {"message": {"role": "assistant", "content": [{"text": text}]}}}
+    else:
+        response_payload = {"content": [{"type": "text", "text": text}]}
+
+    client = boto3.client("bedrock-runtime", region_name="us-east-1")
+    pool = BedrockClientPool(["us-east-1"], client_factory=lambda region: client)
+    monkeypatch.setattr(lambda_function, "bedrock_pool", pool)
+
+    with Stubber(client) as stub:
         stub.add_response(
             "invoke_model",
             {
@@ -62,3 +60,114 @@ def test_lambda_handler_parses_bedrock_response():
     assert body["summary"].startswith("Summary line")
     assert body["hypotheses"] == ["rc1"]
     assert body["checks"] == ["check1"]
+
+
+def test_followup_reuses_session_without_resending_logs(monkeypatch):
+    prompts = []
+
+    def fake_call(prompt):
+        prompts.append(prompt)
+        return (
+            f"Answer {len(prompts)}\n\n"
+            "Possible root causes:\n- rc\n"
+            "Checks and suggested actions:\n- check"
+        )
+
+    monkeypatch.setattr(lambda_function, "call_bedrock_model", fake_call)
+
+    logs = "\n".join(f"2024-09-12T10:22:{i:02d}Z INFO request ok" for i in range(60))
+    logs += "\n2024-09-12T10:23:00Z ERROR AccessDenied calling bedrock:InvokeModel"
+    first = lambda_function.lambda_handler(
+        {"body": json.dumps({"incident_title": "t", "service_context": "svc", "symptoms": "a", "logs": logs})},
+        None,
+    )
+    session_id = json.loads(first["body"])["session_id"]
+    assert session_id
+
+    for i in range(60):
+        resp = lambda_function.lambda_handler(
+            {"body": json.dumps({"session_id": session_id, "question": f"what if it's IAM? ({i})"})},
+            None,
+        )
+        assert resp["statusCode"] == 200
+        body = json.loads(resp["body"])
+        assert body["session_id"] == session_id
+        assert body["summary"] == f"Answer {i + 2}"
+
+    followups = prompts[1:]
+    assert all("INFO request ok" not in p for p in followups)
+    assert "ERROR AccessDenied" in followups[0]
+    assert "what if it's IAM? (59)" in followups[-1]
+    # Compaction keeps follow-up prompts bounded instead of growing per turn.
+    assert len(followups[-1]) < len(prompts[0])
+    assert abs(len(followups[-1]) - len(followups[-10])) < 10
+
+
+def test_followup_with_unknown_session_returns_404():
+    resp = lambda_function.lambda_handler(
+        {"body": json.dumps({"session_id": "nope", "question": "why?"})}, None
+    )
+
+    assert resp["statusCode"] == 404
+
+
+def test_malformed_followup_input_returns_400():
+    bodies = [
+        [1, 2],
+        {"session_id": ["x"], "question": "q"},
+        {"session_id": "x", "question": 5},
+        {"session_id": "x"},
+    ]
+
+    for body in bodies:
+        resp = lambda_function.lambda_handler({"body": json.dumps(body)}, None)
+        assert resp["statusCode"] == 400, body
+
+
+def test_session_store_errors_return_500(monkeypatch):
+    class BrokenStore:
+        def get(self, session_id):
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(lambda_function, "session_store", BrokenStore())
+
+    resp = lambda_function.lambda_handler(
+        {"body": json.dumps({"session_id": "x", "question": "why?"})}, None
+    )
+
+    assert resp["statusCode"] == 500
+
+
+def test_compact_context_is_bounded_for_long_fields():
+    huge = "x" * 10_000
+    payload = {"incident_title": huge, "service_context": huge, "symptoms": huge, "logs": huge}
+    parsed = {"summary": huge, "hypotheses": [huge] * 10}
+
+    assert len(lambda_function.compact_context(payload, parsed)) < 3000
+
+
+def test_live_calls_use_the_request_schema_of_the_model_family(monkeypatch):
+    nova, haiku = "amazon.nova-pro-v1:0", "anthropic.claude-3-haiku-20240307-v1:0"
+    sent = []
+
+    class RecordingClient:
+        def invoke_model(self, **kwargs):
+            sent.append(kwargs)
+            body = json.loads(kwargs["body"])
+            if kwargs["modelId"] == nova:
+                assert body["schemaVersion"] == "messages-v1" and "anthropic_version" not in body
+                payload = {"output": {"message": {"content": [{"text": "nova says hi"}]}}}
+            else:
+                assert body["anthropic_version"] == "bedrock-2023-05-31"
+                payload = {"content": [{"type": "text", "text": "haiku says hi"}]}
+            return {"body": _make_streaming_body(payload)}
+
+    client = RecordingClient()
+    pool = BedrockClientPool(["us-east-1"], client_factory=lambda region: client)
+    monkeypatch.setattr(lambda_function, "bedrock_pool", pool)
+
+    monkeypatch.setattr(lambda_function, "BEDROCK_MODEL_ID", nova)
+    assert lambda_function.call_bedrock_model("p") == "nova says hi"
+    monkeypatch.setattr(lambda_function, "BEDROCK_MODEL_ID", haiku)
+    assert lambda_function.call_bedrock_model("p") == "haiku says hi"
+    assert [k["modelId"] for k in sent] == [nova, haiku]
@@ -0,0 +1,56 @@
+import pytest
+
+from session_store import InMemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store_and_clock(request, tmp_path, clock):
+    if request.param == "memory":
+        store = InMemorySessionStore(ttl_seconds=60, clock=clock)
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, clock=clock)
+    return store, clock
+
+
+def test_store_roundtrip_and_delete(store_and_clock):
+    store, _ = store_and_clock
+    store.put("s1", {"context": "ctx", "turns": [{"question": "q", "answer": "a"}]})
+
+    assert store.get("s1") == {"context": "ctx", "turns": [{"question": "q", "answer": "a"}]}
+    assert store.get("missing") is None
+
+    store.delete("s1")
+    assert store.get("s1") is None
+
+
+def test_store_expires_after_ttl_and_put_refreshes(store_and_clock):
+    store, clock = store_and_clock
+    store.put("s1", {"n": 1})
+
+    clock.now += 50
+    store.put("s1", {"n": 2})
+    clock.now += 50
+    assert store.get("s1") == {"n": 2}
+
+    clock.now += 11
+    assert store.get("s1") is None
+
+
+def test_memory_store_evicts_expired_and_caps_size(clock):
+    store = InMemorySessionStore(ttl_seconds=60, clock=clock, max_sessions=2)
+
+    store.put("old", {})
+    clock.now += 61
+    store.put("a", {})
+    assert len(store) == 1
+
+    store.put("b", {})
+    store.put("c", {})
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") == {}
+
+
+def test_create_session_store_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_session_store("redis", 60)
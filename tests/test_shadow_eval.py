@@ -0,0 +1,273 @@
+import json
+import random
+import time
+from io import BytesIO
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+import lambda_function
+from shadow_eval import (
+    ShadowEvaluator,
+    dispatch_lambda_client,
+    format_report,
+    load_records,
+    main,
+    percentile,
+    summarize,
+)
+
+FAST = "anthropic.claude-3-haiku-20240307-v1:0"
+SLOW = "amazon.nova-pro-v1:0"
+GOOD_TEXT = (
+    "Summary line\n\n"
+    "Possible root causes:\n- rc1\n"
+    "Checks and suggested actions:\n- check1"
+)
+
+
+class FakeBedrockClient:
+    """Offline bedrock-runtime stand-in with per-model latency profiles.
+
+    ``profiles`` maps model ID to a list of latencies (seconds) cycled per
+    call, plus optional ``text``/``usage``/``error`` overrides. Like Bedrock,
+    it rejects a request body that does not match the model family's schema
+    and answers in that family's response shape.
+    """
+
+    def __init__(self, clock, profiles):
+        self.clock = clock
+        self.profiles = profiles
+        self.calls = {m: 0 for m in profiles}
+
+    def invoke_model(self, modelId, **kwargs):
+        profile = self.profiles[modelId]
+        latencies = profile["latencies"]
+        self.clock.now += latencies[self.calls[modelId] % len(latencies)]
+        self.calls[modelId] += 1
+        if "error" in profile:
+            raise profile["error"]
+
+        body = json.loads(kwargs["body"])
+        text = profile.get("text", GOOD_TEXT)
+        if "amazon.nova" in modelId:
+            valid = body.get("schemaVersion") == "messages-v1" and "inferenceConfig" in body
+            payload = {"output": {"message": {"role": "assistant", "content": [{"text": text}]}}}
+        else:
+            valid = body.get("anthropic_version") == "bedrock-2023-05-31"
+            payload = {"content": [{"type": "text", "text": text}]}
+        if not valid:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Malformed input request"}},
+                "InvokeModel",
+            )
+        if "usage" in profile:
+            payload["usage"] = profile["usage"]
+        data = json.dumps(payload).encode()
+        return {"body": StreamingBody(BytesIO(data), len(data))}
+
+
+def _make_evaluator(clock, profiles, **kwargs):
+    client = FakeBedrockClient(clock, profiles)
+    records = []
+    evaluator = ShadowEvaluator(
+        client,
+        list(profiles),
+        kwargs.pop("sample_rate", 1.0),
+        lambda_function.parse_ai_response,
+        sink=records.append,
+        clock=clock,
+        rng=random.Random(3),
+        # One worker keeps fake-clock latencies exact; concurrency is tested separately.
+        max_workers=kwargs.pop("max_workers", 1),
+        **kwargs,
+    )
+    return evaluator, client, records
+
+
+def test_run_records_latency_tokens_cost_and_parse_quality(clock):
+    evaluator, _, records = _make_evaluator(
+        clock,
+        {
+            FAST: {"latencies": [0.4], "usage": {"input_tokens": 1000, "output_tokens": 200}},
+            SLOW: {"latencies": [2.5], "text": "no sections here", "usage": {"inputTokens": 900}},
+        }
+    )
+
+    evaluator.run({"job_id": "j1", "prompt": "p" * 400})
+
+    fast, slow = records
+    assert fast["model_id"] == FAST and fast["ok"] and fast["job_id"] == "j1"
+    assert fast["latency_ms"] == 400.0
+    assert (fast["input_tokens"], fast["output_tokens"], fast["tokens_estimated"]) == (1000, 200, False)
+    assert fast["cost_usd"] == 0.0005
+    assert fast["has_hypotheses"] and fast["has_checks"]
+
+    assert slow["latency_ms"] == 2500.0
+    assert slow["ok"]
+    assert slow["tokens_estimated"] and slow["input_tokens"] == 900 and slow["output_tokens"] == 4
+    assert not slow["has_hypotheses"] and not slow["has_checks"]
+
+
+def test_run_records_errors_without_raising(clock):
+    throttled = ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "InvokeModel")
+    evaluator, _, records = _make_evaluator(clock, {FAST: {"latencies": [0.1], "error": throttled}})
+
+    evaluator.run({"prompt": "p"})
+
+    assert records[0]["ok"] is False
+    assert "ThrottlingException" in records[0]["error"]
+
+
+def test_maybe_dispatch_samples_configured_fraction(clock):
+    jobs = []
+    evaluator, client, _ = _make_evaluator(
+        clock, {FAST: {"latencies": [0.1]}}, sample_rate=0.25, dispatch=jobs.append
+    )
+
+    hits = sum(evaluator.maybe_dispatch("p") for _ in range(2000))
+
+    assert 400 < hits < 600
+    assert len(jobs) == hits
+    # Dispatching only hands the job off; no model call happens on the live path.
+    assert client.calls[FAST] == 0
+
+
+def test_handler_dispatches_shadow_job_and_runs_it_on_self_invoke(clock, monkeypatch):
+    jobs = []
+    evaluator, client, records = _make_evaluator(clock, {FAST: {"latencies": [0.3]}}, dispatch=jobs.append)
+    monkeypatch.setattr(lambda_function, "shadow_evaluator", evaluator)
+    monkeypatch.setattr(lambda_function, "call_bedrock_model", lambda prompt: GOOD_TEXT)
+
+    resp = lambda_function.lambda_handler(
+        {"body": json.dumps({"incident_title": "t", "service_context": "svc", "logs": "b"})}, None
+    )
+
+    assert resp["statusCode"] == 200
+    assert len(jobs) == 1 and client.calls[FAST] == 0
+
+    lambda_function.lambda_handler({"shadow_eval": jobs[0]}, None)
+
+    assert client.calls[FAST] == 1
+    assert records[0]["job_id"] == jobs[0]["job_id"]
+
+
+def test_handler_ignores_shadow_key_from_http_events(clock, monkeypatch):
+    evaluator, client, _ = _make_evaluator(clock, {FAST: {"latencies": [0.3]}}, sample_rate=0.0)
+    monkeypatch.setattr(lambda_function, "shadow_evaluator", evaluator)
+    monkeypatch.setattr(lambda_function, "call_bedrock_model", lambda prompt: GOOD_TEXT)
+
+    event = {
+        "requestContext": {"http": {"method": "POST"}},
+        "shadow_eval": {"prompt": "p"},
+        "body": json.dumps({"incident_title": "t"}),
+    }
+    resp = lambda_function.lambda_handler(event, None)
+
+    assert "summary" in json.loads(resp["body"])
+    assert client.calls[FAST] == 0
+
+
+def test_report_aggregates_per_model_percentiles_and_cost(clock, tmp_path, capsys):
+    evaluator, _, records = _make_evaluator(
+        clock,
+        {
+            FAST: {"latencies": [0.2, 0.3, 0.4, 1.0], "usage": {"input_tokens": 800, "output_tokens": 300}},
+            SLOW: {"latencies": [1.5, 2.0, 2.5, 6.0], "usage": {"inputTokens": 800, "outputTokens": 300}},
+        }
+    )
+    for _ in range(100):
+        evaluator.run({"prompt": "p"})
+
+    summary = summarize(records)
+    assert summary[FAST]["requests"] == 100
+    assert summary[FAST]["p50_ms"] == 300.0 and summary[FAST]["p99_ms"] == 1000.0
+    assert summary[SLOW]["p50_ms"] == 2000.0 and summary[SLOW]["p99_ms"] == 6000.0
+    assert summary[FAST]["cost_per_incident_usd"] < summary[SLOW]["cost_per_incident_usd"]
+    assert summary[FAST]["parsed_rate"] == 1.0
+
+    # The CLI accepts both raw JSONL and CloudWatch-style log lines.
+    path = tmp_path / "records.jsonl"
+    lines = [json.dumps(r) for r in records[:100]]
+    lines += [f"2024-09-12T10:00:00Z INFO SHADOW_EVAL {json.dumps(r)}" for r in records[100:]]
+    path.write_text("\n".join(lines) + "\nnot a record\n")
+    assert len(load_records(path.read_text().splitlines())) == 200
+
+    assert main([str(path)]) == 0
+    out = capsys.readouterr().out
+    assert out == format_report(summary) + "\n"
+    assert f"| {FAST} | 100 | 0 | 300 | 1000 |" in out
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile([5.0], 99) == 5.0
+    assert percentile(list(range(1, 101)), 50) == 50
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_run_dedupes_models_and_skips_malformed_jobs(clock):
+    evaluator, client, records = _make_evaluator(clock, {FAST: {"latencies": [0.1]}})
+
+    assert ShadowEvaluator(client, [FAST, FAST], 1.0, lambda_function.parse_ai_response).model_ids == [FAST]
+    evaluator.run({"prompt": "p", "model_ids": [FAST, FAST]})
+    assert len(records) == 1
+
+    assert evaluator.run({"model_ids": [FAST]}) == []
+    resp = lambda_function.lambda_handler({"shadow_eval": {"job_id": "j"}}, None)
+    assert resp["statusCode"] == 400
+    assert client.calls[FAST] == 1
+
+
+def test_bad_shadow_settings_do_not_break_import(monkeypatch):
+    monkeypatch.setenv("SHADOW_SAMPLE_RATE", "5%")
+    monkeypatch.setenv("SHADOW_MODEL_PRICES", "{not json")
+
+    assert lambda_function._shadow_sample_rate() == 0.0
+    assert lambda_function._shadow_model_prices() == lambda_function.DEFAULT_PRICES_PER_1K
+
+    monkeypatch.setenv("SHADOW_MODEL_PRICES", '{"my-model": [0.001, 0.002], "bad": 3}')
+    assert lambda_function._shadow_model_prices() == lambda_function.DEFAULT_PRICES_PER_1K
+
+
+class SleepingBedrockClient:
+    """Real-time fake: each model sleeps for its configured latency."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    def invoke_model(self, modelId, **kwargs):
+        time.sleep(self.latencies[modelId])
+        data = json.dumps({"content": [{"text": GOOD_TEXT}]}).encode()
+        return {"body": StreamingBody(BytesIO(data), len(data))}
+
+
+def test_run_replays_models_concurrently_within_time_budget():
+    other = "anthropic.claude-3-5-haiku-20241022-v1:0"
+    hung = "anthropic.claude-3-sonnet-20240229-v1:0"
+    client = SleepingBedrockClient({FAST: 0.2, other: 0.2, hung: 5.0})
+    records = []
+    evaluator = ShadowEvaluator(
+        client, [FAST, other, hung], 1.0, lambda_function.parse_ai_response, sink=records.append
+    )
+
+    start = time.perf_counter()
+    evaluator.run({"job_id": "j", "prompt": "p"}, time_budget_seconds=0.6)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert [r["model_id"] for r in records] == [FAST, other, hung]
+    assert records[0]["ok"] and records[1]["ok"]
+    assert records[2]["ok"] is False and "Timed out" in records[2]["error"]
+
+
+def test_dispatch_client_fails_fast():
+    config = dispatch_lambda_client("us-east-1").meta.config
+
+    assert config.connect_timeout <= 1 and config.read_timeout <= 1
+    assert config.retries["total_max_attempts"] == 1
+
+
+def test_shadow_replays_use_their_own_pool():
+    assert lambda_function.shadow_evaluator.client is not lambda_function.bedrock_pool